@@ -1,12 +1,166 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
 import os
-import json
+
+try:
+    import orjson # Optional, faster JSON backend for settings
+except ImportError:
+    orjson = None
 
 # Application Constants
 SETTINGS_FILE = "settings.json"
 DEFAULT_EMPTY_FILE_NAME = "A_BLKSAVE" # New constant for empty file name fallback
 
+# In-memory copy of the last parsed settings, keyed by the file's mtime
+_SETTINGS_CACHE = {"mtime": None, "data": None}
+
+def _dumps(obj):
+    """
+    Serializes settings to indented UTF-8 JSON, using orjson when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    import json
+    return json.dumps(obj, indent=4).encode("utf-8") # Added indentation for JSON readability
+
+def _loads(data):
+    """
+    Parses UTF-8 JSON settings, using orjson when available.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    import json
+    return json.loads(data)
+
+# Block of horizontal range lines
+_RANGE_BLOCK = """  range:p2=-32, 32
+  range:p2=-28, 0
+  range:p2=-24, 24
+  range:p2=-20, 0
+  range:p2=-16, 16
+  range:p2=-12, 0
+  range:p2=-8, 8
+  range:p2=-4, 0
+  range:p2=4, 0
+  range:p2=8, 8
+  range:p2=12, 0
+  range:p2=16, 16
+  range:p2=20, 0
+  range:p2=24, 24
+  range:p2=28, 0
+  range:p2=32, 32"""
+
+# Static BLK template lines preceding the central line toggles
+_TEMPLATE_HEAD = "\n".join([
+    "crosshairHorVertSize:p2=3, 2",
+    "rangefinderProgressBarColor1:c=0, 255, 0, 64",
+    "rangefinderProgressBarColor2:c=255, 255, 255, 64",
+    "rangefinderTextScale:r=0.7",
+    "rangefinderUseThousandth:b=no",
+    "rangefinderVerticalOffset:r=0.1",
+    "rangefinderHorizontalOffset:r=5",
+    "detectAllyTextScale:r=0.7",
+    "detectAllyOffset:p2=4, 0.05",
+    "fontSizeMult:r=1",
+    "lineSizeMult:r=1",
+])
+
+# Rangefinder distance marks as (distance, label)
+_DISTANCES = (
+    (200, 0),
+    (400, 4),
+    (600, 0),
+    (800, 8),
+    (1000, 0),
+    (1200, 12),
+    (1400, 0),
+    (1600, 16),
+    (1800, 0),
+    (2000, 20),
+    (2200, 0),
+    (2400, 24),
+    (2600, 0),
+    (2800, 28),
+    (3000, 0),
+    (3200, 32),
+    (3400, 0),
+    (3600, 36),
+    (3800, 0),
+    (4000, 40),
+    (4200, 0),
+    (4400, 44),
+    (4600, 0),
+    (4800, 48),
+    (5000, 0),
+    (5200, 52),
+    (5400, 0),
+    (5600, 56),
+    (5800, 0),
+    (6000, 60),
+)
+_DISTANCE_BLOCK = "crosshair_distances{\n" + "\n".join(f"  distance:p3={d}, {v}, 0" for d, v in _DISTANCES) + "\n}"
+
+_MATCH_EXP_CLASS = """matchExpClass{
+  exp_tank:b = yes
+  exp_heavy_tank:b = yes
+  exp_tank_destroyer:b = yes
+  exp_SPAA:b = yes
+}"""
+
+# Static BLK template lines following the central line toggles, up to the ranges block
+_TEMPLATE_MIDDLE = "\n".join([
+    "drawSightMask:b=yes",
+    "useSmoothEdge:b=yes",
+    "crosshairColor:c=0, 0, 0, 0",
+    "crosshairLightColor:c=0, 0, 0, 0",
+    "crosshairDistHorSizeMain:p2=0.03, 0.02",
+    "crosshairDistHorSizeAdditional:p2=0.005, 0.003",
+    "distanceCorrectionPos:p2=-0.26, -0.05",
+    "drawDistanceCorrection:b=yes",
+    "", # New line for separation
+
+    _DISTANCE_BLOCK,
+    "", # New line for separation
+
+    "crosshair_hor_ranges{",
+])
+
+_TEMPLATE_TAIL = "\n".join([
+    "}",
+    "", # New line for separation
+
+    _MATCH_EXP_CLASS,
+])
+
+# Everything after the toggles, pre-joined with and without the range lines
+_STATIC_SUFFIX = _TEMPLATE_MIDDLE + "\n" + _TEMPLATE_TAIL
+_STATIC_SUFFIX_WITH_RANGES = _TEMPLATE_MIDDLE + "\n" + _RANGE_BLOCK + "\n" + _TEMPLATE_TAIL
+
+# Opening of a crosshair snippet that already carries its own drawLines block
+_DRAWLINES_PREFIX = "drawLines{"
+
+def _encode(text):
+    """
+    Encodes BLK text to UTF-8 bytes, translating newlines as a text-mode file would.
+    """
+    return text.replace("\n", os.linesep).encode("utf-8")
+
+# The static template is encoded once so saving only has to encode the user snippet
+_TEMPLATE_HEAD_BYTES = _encode(_TEMPLATE_HEAD)
+_STATIC_SUFFIX_BYTES = _encode(_STATIC_SUFFIX)
+_STATIC_SUFFIX_WITH_RANGES_BYTES = _encode(_STATIC_SUFFIX_WITH_RANGES)
+_NEWLINE_BYTES = _encode("\n")
+_DRAWLINES_OPEN_BYTES = _encode("\n\ndrawLines{\n")
+_DRAWLINES_CLOSE_BYTES = _encode("\n}")
+
+# Central line toggle lines, keyed by (drawCentralLineVert, drawCentralLineHorz)
+_TOGGLE_LINES = {
+    (True, True): _encode("drawCentralLineVert:b=yes\ndrawCentralLineHorz:b=yes"),
+    (True, False): _encode("drawCentralLineVert:b=yes\ndrawCentralLineHorz:b=no"),
+    (False, True): _encode("drawCentralLineVert:b=no\ndrawCentralLineHorz:b=yes"),
+    (False, False): _encode("drawCentralLineVert:b=no\ndrawCentralLineHorz:b=no"),
+}
+
+
 class BLKGeneratorApp:
     """
     Tkinter application for generating BLK files.
@@ -25,11 +179,21 @@ class BLKGeneratorApp:
 
         # Load settings upon application startup
         self.settings = self._load_settings()
+        # Settings changes are batched and written once, on Start or on close
+        self._settings_dirty = False
+        master.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # Single worker thread for BLK file writes, created on the first save
+        self._io_pool = None
+        # Last save_path and its normalized form, derived in memory only
+        self._save_dir_cache = (None, None)
 
         # Tkinter variables for checkbox states
         self.include_ranges = tk.BooleanVar(value=True)
         self.vert_var = tk.BooleanVar(value=True)
         self.horz_var = tk.BooleanVar(value=True)
+        # Generated templates keyed by checkbox states (at most 8 entries)
+        self._template_cache = {}
 
         # Create UI widgets
         self._create_widgets()
@@ -40,6 +204,9 @@ class BLKGeneratorApp:
         """
         Creates all UI widgets for the application.
         """
+        # Imported lazily to keep module import light before the root window appears
+        from tkinter import scrolledtext
+
         # Application Title
         tk.Label(self.master, text="BLK Generator", font=("Arial", 24)).pack(pady=10)
 
@@ -56,8 +223,11 @@ class BLKGeneratorApp:
         self.path_label = tk.Label(path_frame, text="", font=("Arial", 12)) # Reduced font size for better readability
         self.path_label.pack(side=tk.LEFT, padx=5)
 
-        # Input/display area for crosshair code
-        self.input_text = scrolledtext.ScrolledText(self.master, width=45, height=10, wrap=tk.WORD)
+        # Input/display area for crosshair code; undo is off by default in Tk, pinned here explicitly
+        self.input_text = scrolledtext.ScrolledText(
+            self.master, width=45, height=10, wrap=tk.WORD,
+            undo=False, autoseparators=False, maxundo=0,
+        )
         self.input_text.pack(pady=10)
 
         # Button to load text from a .txt file
@@ -80,28 +250,66 @@ class BLKGeneratorApp:
         Returns:
             dict: A dictionary with loaded settings or an empty dictionary if the file is not found/corrupted.
         """
-        if os.path.exists(SETTINGS_FILE):
-            try:
-                with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                messagebox.showerror("Error", f"Could not read settings from {SETTINGS_FILE}. File might be corrupted.")
-                return {}
-            except IOError as e:
-                messagebox.showerror("Error", f"Error loading settings from {SETTINGS_FILE}: {e}")
-                return {}
-        return {}
+        from tkinter import messagebox
+
+        # A single stat both checks existence and provides the cache key
+        try:
+            mtime = os.stat(SETTINGS_FILE).st_mtime
+        except OSError: # Same as os.path.exists returning False
+            return {}
+
+        # Skip the read and parse if the file has not changed since last access
+        if _SETTINGS_CACHE["mtime"] == mtime:
+            return dict(_SETTINGS_CACHE["data"])
+        try:
+            with open(SETTINGS_FILE, "rb") as f:
+                data = _loads(f.read())
+            _SETTINGS_CACHE["mtime"] = mtime
+            _SETTINGS_CACHE["data"] = dict(data)
+            return data
+        except ValueError: # Raised as JSONDecodeError by both json and orjson
+            messagebox.showerror("Error", f"Could not read settings from {SETTINGS_FILE}. File might be corrupted.")
+            return {}
+        except IOError as e:
+            messagebox.showerror("Error", f"Error loading settings from {SETTINGS_FILE}: {e}")
+            return {}
 
     def _save_settings(self):
         """
         Saves the current application settings to the SETTINGS_FILE.
         """
+        from tkinter import messagebox
+
+        # Serialize first so a failure cannot leave a half-written file behind
+        payload = _dumps(self.settings)
+        tmp_file = SETTINGS_FILE + ".tmp"
         try:
-            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.settings, f, indent=4) # Added indentation for JSON readability
+            with open(tmp_file, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_file, SETTINGS_FILE)
+            self._settings_dirty = False
+            # Keep the cache in sync so the next load is a no-op
+            _SETTINGS_CACHE["mtime"] = os.stat(SETTINGS_FILE).st_mtime
+            _SETTINGS_CACHE["data"] = dict(self.settings)
         except IOError as e:
+            # Do not leave a partial temp file behind
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
             messagebox.showerror("Error", f"Could not save settings to {SETTINGS_FILE}: {e}")
 
+    def _on_close(self):
+        """
+        Flushes pending settings changes to disk and closes the application.
+        """
+        if self._settings_dirty:
+            self._save_settings()
+        # Do not block the Tk callback; a pending BLK write still completes before exit
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False)
+        self.master.destroy()
+
     def _update_path_label(self):
         """
         Updates the path label to display the selected save folder.
@@ -118,10 +326,16 @@ class BLKGeneratorApp:
         Opens a dialog to choose a save folder.
         Updates settings and the path label.
         """
-        folder = filedialog.askdirectory()
+        from tkinter import filedialog
+
+        # Start in the last chosen folder so the dialog opens where the user left off
+        folder = filedialog.askdirectory(
+            parent=self.master,
+            initialdir=self.settings.get("save_path", os.path.expanduser("~")),
+        )
         if folder:
             self.settings["save_path"] = folder
-            self._save_settings()
+            self._settings_dirty = True
             self._update_path_label()
 
     def _browse_txt_file(self):
@@ -129,13 +343,30 @@ class BLKGeneratorApp:
         Opens a dialog to choose a .txt file and loads its content
         into the input text area.
         """
-        path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
+        from tkinter import filedialog, messagebox
+
+        path = filedialog.askopenfilename(
+            parent=self.master,
+            initialdir=self.settings.get("last_txt_dir", os.path.expanduser("~")),
+            filetypes=[("Text files", "*.txt")],
+        )
         if path:
+            # Remember the folder for the next time the dialog is opened
+            self.settings["last_txt_dir"] = os.path.dirname(path)
+            self._settings_dirty = True
             try:
                 with open(path, "r", encoding="utf-8") as file:
                     self.input_text.delete("1.0", tk.END) # Clear current text
-                    self.input_text.insert(tk.END, file.read()) # Insert file content
-            except IOError as e:
+                    # Insert file content in 64 KiB chunks to bound memory and keep the UI responsive
+                    while True:
+                        chunk = file.read(65536)
+                        if not chunk:
+                            break
+                        self.input_text.insert(tk.END, chunk)
+                        self.master.update_idletasks()
+            except (OSError, UnicodeDecodeError) as e:
+                # Never leave a partially loaded script behind
+                self.input_text.delete("1.0", tk.END)
                 messagebox.showerror("Error", f"Could not read file {path}: {e}")
 
     def _load_template(self):
@@ -143,124 +374,50 @@ class BLKGeneratorApp:
         Generates the main part of the BLK file content based on current settings.
 
         Returns:
-            str: The generated BLK string template.
+            bytes: The generated BLK template, encoded and ready to be written.
         """
-        # Block of horizontal range lines
-        RANGE_BLOCK = """  range:p2=-32, 32
-  range:p2=-28, 0
-  range:p2=-24, 24
-  range:p2=-20, 0
-  range:p2=-16, 16
-  range:p2=-12, 0
-  range:p2=-8, 8
-  range:p2=-4, 0
-  range:p2=4, 0
-  range:p2=8, 8
-  range:p2=12, 0
-  range:p2=16, 16
-  range:p2=20, 0
-  range:p2=24, 24
-  range:p2=28, 0
-  range:p2=32, 32"""
-
-        template_parts = [
-            "crosshairHorVertSize:p2=3, 2",
-            "rangefinderProgressBarColor1:c=0, 255, 0, 64",
-            "rangefinderProgressBarColor2:c=255, 255, 255, 64",
-            "rangefinderTextScale:r=0.7",
-            "rangefinderUseThousandth:b=no",
-            "rangefinderVerticalOffset:r=0.1",
-            "rangefinderHorizontalOffset:r=5",
-            "detectAllyTextScale:r=0.7",
-            "detectAllyOffset:p2=4, 0.05",
-            "fontSizeMult:r=1",
-            "lineSizeMult:r=1",
-            # Using f-strings for conditional inclusion/exclusion of lines
-            f"drawCentralLineVert:b={'yes' if self.vert_var.get() else 'no'}",
-            f"drawCentralLineHorz:b={'yes' if self.horz_var.get() else 'no'}",
-            "drawSightMask:b=yes",
-            "useSmoothEdge:b=yes",
-            "crosshairColor:c=0, 0, 0, 0",
-            "crosshairLightColor:c=0, 0, 0, 0",
-            "crosshairDistHorSizeMain:p2=0.03, 0.02",
-            "crosshairDistHorSizeAdditional:p2=0.005, 0.003",
-            "distanceCorrectionPos:p2=-0.26, -0.05",
-            "drawDistanceCorrection:b=yes",
-            "", # New line for separation
-
-            "crosshair_distances{",
-            "  distance:p3=200, 0, 0",
-            "  distance:p3=400, 4, 0",
-            "  distance:p3=600, 0, 0",
-            "  distance:p3=800, 8, 0",
-            "  distance:p3=1000, 0, 0",
-            "  distance:p3=1200, 12, 0",
-            "  distance:p3=1400, 0, 0",
-            "  distance:p3=1600, 16, 0",
-            "  distance:p3=1800, 0, 0",
-            "  distance:p3=2000, 20, 0",
-            "  distance:p3=2200, 0, 0",
-            "  distance:p3=2400, 24, 0",
-            "  distance:p3=2600, 0, 0",
-            "  distance:p3=2800, 28, 0",
-            "  distance:p3=3000, 0, 0",
-            "  distance:p3=3200, 32, 0",
-            "  distance:p3=3400, 0, 0",
-            "  distance:p3=3600, 36, 0",
-            "  distance:p3=3800, 0, 0",
-            "  distance:p3=4000, 40, 0",
-            "  distance:p3=4200, 0, 0",
-            "  distance:p3=4400, 44, 0",
-            "  distance:p3=4600, 0, 0",
-            "  distance:p3=4800, 48, 0",
-            "  distance:p3=5000, 0, 0",
-            "  distance:p3=5200, 52, 0",
-            "  distance:p3=5400, 0, 0",
-            "  distance:p3=5600, 56, 0",
-            "  distance:p3=5800, 0, 0",
-            "  distance:p3=6000, 60, 0",
-            "}",
-            "", # New line for separation
-
-            "crosshair_hor_ranges{"
-        ]
-        if self.include_ranges.get():
-            template_parts.append(RANGE_BLOCK)
-        template_parts.append("}")
-        template_parts.append("") # New line for separation
-
-        template_parts.append("matchExpClass{")
-        template_parts.append("  exp_tank:b = yes")
-        template_parts.append("  exp_heavy_tank:b = yes")
-        template_parts.append("  exp_tank_destroyer:b = yes")
-        template_parts.append("  exp_SPAA:b = yes")
-        template_parts.append("}")
-
-        return "\n".join(template_parts)
-
-    def _combine_template_with_crosshair(self, crosshair_code):
+        vert, horz, include_ranges = self.vert_var.get(), self.horz_var.get(), self.include_ranges.get()
+        key = (vert, horz, include_ranges)
+        if key in self._template_cache:
+            return self._template_cache[key]
+
+        suffix = _STATIC_SUFFIX_WITH_RANGES_BYTES if include_ranges else _STATIC_SUFFIX_BYTES
+        # Only the central line toggles vary between calls
+        toggles = _TOGGLE_LINES[(vert, horz)]
+        template = _NEWLINE_BYTES.join((_TEMPLATE_HEAD_BYTES, toggles, suffix))
+        self._template_cache[key] = template
+        return template
+
+    def _iter_blk_chunks(self, crosshair_code):
         """
-        Combines the generated template with the user-provided crosshair code.
+        Yields the pieces of the BLK file content in order, so they can be
+        written out without first concatenating the whole document.
 
         Args:
-            crosshair_code (str): The crosshair code entered by the user.
+            crosshair_code (str): The crosshair code entered by the user, already stripped.
 
-        Returns:
-            str: The complete BLK file content.
+        Yields:
+            bytes: Consecutive encoded pieces of the complete BLK file content.
         """
-        crosshair_code = crosshair_code.strip()
-        template_content = self._load_template()
+        yield self._load_template()
 
-        # Check if the crosshair code already contains "drawLines{...}"
-        if crosshair_code.startswith("drawLines{") and crosshair_code.endswith("}"):
-            return template_content + "\n" + crosshair_code
+        # Check if the crosshair code already contains "drawLines{...}" by comparing only its ends
+        if crosshair_code[:len(_DRAWLINES_PREFIX)] == _DRAWLINES_PREFIX and crosshair_code[-1:] == "}":
+            yield _NEWLINE_BYTES
+            yield _encode(crosshair_code)
         else:
-            return template_content + "\n\ndrawLines{\n" + crosshair_code + "\n}"
+            yield _DRAWLINES_OPEN_BYTES
+            yield _encode(crosshair_code)
+            yield _DRAWLINES_CLOSE_BYTES
+        # Ensure there is a single newline at the end of the file
+        yield _NEWLINE_BYTES
 
     def _generate_blk(self):
         """
         Generates and saves the BLK file based on user input and settings.
         """
+        from tkinter import messagebox
+
         # If file_name_entry is empty, use DEFAULT_EMPTY_FILE_NAME
         file_name = self.file_name_entry.get().strip() or DEFAULT_EMPTY_FILE_NAME
         save_path = self.settings.get("save_path")
@@ -269,15 +426,57 @@ class BLKGeneratorApp:
             messagebox.showerror("Error", "You did not specify a file path.")
             return
 
-        # Full path to the file
-        full_path = os.path.join(save_path, file_name + ".blk")
-        sight_code = self.input_text.get("1.0", tk.END) # Get all text from ScrolledText
-        final_content = self._combine_template_with_crosshair(sight_code)
+        if self._settings_dirty:
+            self._save_settings()
+
+        # Full path to the file; only re-normalize when save_path has changed
+        cached_path, save_dir = self._save_dir_cache
+        if cached_path != save_path:
+            save_dir = os.path.normpath(save_path)
+            self._save_dir_cache = (save_path, save_dir)
+        full_path = os.path.join(save_dir, file_name + ".blk")
+        # Get all text from ScrolledText, without the trailing newline Tk appends
+        sight_code = self.input_text.get("1.0", "end-1c").strip()
+
+        # Build the content on the UI thread, since it reads the Tk variables
+        chunks = tuple(self._iter_blk_chunks(sight_code))
+        if self._io_pool is None:
+            # Deferred until the first save, so sessions that never save skip the import and worker thread
+            from concurrent.futures import ThreadPoolExecutor
+            self._io_pool = ThreadPoolExecutor(max_workers=1)
+        future = self._io_pool.submit(self._write_file, full_path, chunks)
+        # Poll from the Tk main loop; the worker thread never touches Tk
+        self.master.after(50, self._poll_write, future, full_path)
+
+    @staticmethod
+    def _write_file(full_path, chunks):
+        """
+        Writes the encoded BLK content to disk. Runs on the I/O worker thread.
+
+        Args:
+            full_path (str): Destination path of the BLK file.
+            chunks (tuple): Encoded pieces of the BLK file content.
+        """
+        with open(full_path, "wb", buffering=65536) as f:
+            f.writelines(chunks)
+
+    def _poll_write(self, future, full_path):
+        """
+        Waits for a background BLK file write without blocking the main loop,
+        then shows its outcome.
+
+        Args:
+            future (concurrent.futures.Future): The submitted write task.
+            full_path (str): Destination path of the BLK file.
+        """
+        if not future.done():
+            self.master.after(50, self._poll_write, future, full_path)
+            return
+
+        from tkinter import messagebox
 
         try:
-            with open(full_path, "w", encoding="utf-8") as f:
-                # Ensure there is a single newline at the end of the file
-                f.write(final_content.strip() + "\n")
+            future.result()
             messagebox.showinfo("Done", f"Saved to:\n{full_path}")
         except IOError as e:
             messagebox.showerror("Error", f"Could not save file to {full_path}: {e}")